@@ -21,6 +21,14 @@ from .serial_reader import SerialPacketReader
 from .packet_parser import PacketParser, Packet
 from .lsl_streams import LSLStreamer, LSL_AVAILABLE
 
+# Optional fast JSON encoder for session files
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 # matplotlib imports
 import matplotlib
 matplotlib.use('TkAgg')
@@ -93,8 +101,9 @@ class AcquisitionApp:
         # Time axis
         self.time_axis = np.linspace(0, self.window_seconds, self.buffer_size)
         
-        # Session data
-        self.session_data = []
+        # Session data: one (counters, ch0_adc, ch1_adc, ch0_uv, ch1_uv)
+        # array tuple per parsed batch; expanded to per-packet records on save
+        self.session_chunks = []
         self.latest_packet = {}
         
         # Build UI
@@ -496,7 +505,7 @@ class AcquisitionApp:
         self.is_recording = True
         self.session_start_time = datetime.now()
         self.packet_count = 0
-        self.session_data = []
+        self.session_chunks = []
         self.last_packet_counter = None
         
         # Clear buffers
@@ -571,9 +580,31 @@ class AcquisitionApp:
             self.save_path = Path(path)
             self.path_label.config(text=str(self.save_path))
 
+    def _session_records(self) -> list:
+        """Expand the recorded batch arrays into per-packet dicts."""
+        if not self.session_chunks:
+            return []
+        seq, adc0, adc1, uv0, uv1 = (np.concatenate(col).tolist() for col in zip(*self.session_chunks))
+        return [
+            {"packet_seq": s, "ch0_raw_adc": a0, "ch1_raw_adc": a1, "ch0_uv": v0, "ch1_uv": v1}
+            for s, a0, a1, v0, v1 in zip(seq, adc0, adc1, uv0, uv1)
+        ]
+
+    def _write_ring(self, u0: np.ndarray, u1: np.ndarray):
+        """Write a block of samples into the plot ring buffers."""
+        n = len(u0)
+        idx = (self.buffer_ptr + np.arange(n)) % self.buffer_size
+        if n > self.buffer_size:
+            # only the newest buffer_size samples survive anyway
+            idx, u0, u1 = idx[-self.buffer_size:], u0[-self.buffer_size:], u1[-self.buffer_size:]
+        self.ch0_buffer[idx] = u0
+        self.ch1_buffer[idx] = u1
+        self.buffer_ptr = (self.buffer_ptr + n) % self.buffer_size
+
     def save_session(self):
         """Save session data"""
-        if not self.session_data:
+        session_data = self._session_records()
+        if not session_data:
             messagebox.showwarning("Empty", "No data to save")
             return
         
@@ -592,13 +623,17 @@ class AcquisitionApp:
             },
             "sensor_config": self.config.get("sensor_mapping", {}),
             "filters": self.config.get("filters", {}),
-            "data": self.session_data
+            "data": session_data
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        if ORJSON_AVAILABLE:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump(metadata, f, indent=2)
         
-        messagebox.showinfo("Saved", f"Saved {len(self.session_data)} packets to {filepath}")
+        messagebox.showinfo("Saved", f"Saved {len(session_data)} packets to {filepath}")
 
     def main_loop(self):
         """Main acquisition and update loop (Optimized)"""
@@ -625,29 +660,19 @@ class AcquisitionApp:
                         chunk = np.column_stack((u0, u1)).tolist()
                         self.lsl_raw_uV.push_chunk(chunk)
                     
-                    # 5. Update buffers efficiently
-                    n = len(u0)
-                    for i in range(n):
-                        # Simple duplicate check (last counter)
-                        if self.last_packet_counter == ctrs[i]:
-                            continue
-                        self.last_packet_counter = ctrs[i]
-                        
-                        self.ch0_buffer[self.buffer_ptr] = u0[i]
-                        self.ch1_buffer[self.buffer_ptr] = u1[i]
-                        self.buffer_ptr = (self.buffer_ptr + 1) % self.buffer_size
-                        
+                    # 5. Drop repeated counters (same as the last kept packet),
+                    # then update buffers / recording once for the whole batch
+                    keep = np.empty(len(ctrs), dtype=bool)
+                    keep[0] = self.last_packet_counter != ctrs[0]
+                    keep[1:] = ctrs[1:] != ctrs[:-1]
+                    if keep.any():
+                        if not keep.all():
+                            ctrs, r0, r1, u0, u1 = ctrs[keep], r0[keep], r1[keep], u0[keep], u1[keep]
+                        self.last_packet_counter = ctrs[-1]
+                        self._write_ring(u0, u1)
                         if self.is_recording:
-                            # Still using dict for now, but batching parser already saved time
-                            self.session_data.append({
-                                "packet_seq": int(ctrs[i]),
-                                "ch0_raw_adc": int(r0[i]),
-                                "ch1_raw_adc": int(r1[i]),
-                                "ch0_uv": float(u0[i]),
-                                "ch1_uv": float(u1[i])
-                            })
-                        
-                        self.packet_count += 1
+                            self.session_chunks.append((ctrs, r0, r1, u0, u1))
+                        self.packet_count += len(ctrs)
 
             # Update UI labels
             self.packet_label.config(text=str(self.packet_count))
@@ -21,6 +21,14 @@ class PacketParser:
         # Format: B (Sync1), B (Sync2), B (Counter), >H (CH0), >H (CH1), B (End)
         # We skip sync bytes and end byte for speed
         self._struct_fmt = ">BHH" # Counter, CH0, CH1
+        # Same layout as a numpy record so whole blocks can be decoded at once
+        self._batch_dtype = np.dtype([
+            ("sync", "u1", (2,)),
+            ("counter", "u1"),
+            ("ch0", ">u2"),
+            ("ch1", ">u2"),
+            ("end", "u1"),
+        ])
 
     def parse(self, packet_bytes: bytes) -> Packet:
         if not packet_bytes or len(packet_bytes) != self.packet_len:
@@ -33,17 +41,18 @@ class PacketParser:
     def parse_batch(self, batch_bytes: List[bytes]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         Parse a list of byte packets into numpy arrays for speed.
+        The packets are joined into one block and decoded with a single
+        np.frombuffer call instead of a struct.unpack per packet.
         Returns (counters, ch0_raw, ch1_raw)
         """
         n = len(batch_bytes)
-        counters = np.zeros(n, dtype=np.uint8)
-        ch0_raw = np.zeros(n, dtype=np.uint16)
-        ch1_raw = np.zeros(n, dtype=np.uint16)
-
-        for i, pkt in enumerate(batch_bytes):
-            c, r0, r1 = struct.unpack_from(self._struct_fmt, pkt, 2)
-            counters[i] = c
-            ch0_raw[i] = r0
-            ch1_raw[i] = r1
+        block = b"".join(batch_bytes)
+        if len(block) != n * self.packet_len:
+            raise ValueError(f"Invalid packet length in batch: {len(block)} bytes, expected {n * self.packet_len}")
+
+        records = np.frombuffer(block, dtype=self._batch_dtype, count=n)
+        counters = records["counter"].copy()
+        ch0_raw = records["ch0"].astype(np.uint16)
+        ch1_raw = records["ch1"].astype(np.uint16)
 
         return counters, ch0_raw, ch1_raw
@@ -120,43 +120,54 @@ class SerialPacketReader:
                 time.sleep(0.1)
                 continue
             try:
-                available = self.ser.in_waiting
-                if available:
-                    chunk = self.ser.read(min(available, 4096))
-                    if chunk:
-                        self.bytes_received += len(chunk)
-                        buffer.extend(chunk)
-                        self._process_buffer(buffer)
-                else:
-                    time.sleep(0.001)
+                # Block (up to the port timeout) for at least one packet
+                # instead of spinning on in_waiting with a 1 ms sleep
+                want = max(self.packet_len, min(self.ser.in_waiting, 4096))
+                chunk = self.ser.read(want)
+                if chunk:
+                    self.bytes_received += len(chunk)
+                    buffer.extend(chunk)
+                    self._process_buffer(buffer)
             except Exception as e:
                 print(f"[SerialReader] Read error: {e}")
                 time.sleep(0.05)
 
     def _process_buffer(self, buffer: bytearray):
         """Process incoming buffer for valid packets (Optimized)"""
+        sync = bytes((self.sync1, self.sync2))
+        last_start = len(buffer) - self.packet_len
+        received = False
         i = 0
-        while i <= len(buffer) - self.packet_len:
-            if buffer[i] == self.sync1 and buffer[i+1] == self.sync2:
-                # Candidate packet
-                if buffer[i + self.packet_len - 1] == self.end_byte:
-                    packet_bytes = bytes(buffer[i : i + self.packet_len])
-                    try:
-                        self.data_queue.put_nowait(packet_bytes)
-                        self.packets_received += 1
-                        self.last_packet_time = time.time()
-                    except queue.Full:
-                        self.packets_dropped += 1
-                    i += self.packet_len
-                else:
-                    # Bad end byte
-                    i += 1
-                    self.sync_errors += 1
-            else:
+        while i <= last_start:
+            # Jump straight to the next sync pair instead of stepping byte by byte
+            j = buffer.find(sync, i, last_start + 2)
+            if j < 0:
                 # Not synced
+                self.sync_errors += last_start + 1 - i
+                i = last_start + 1
+                break
+            self.sync_errors += j - i
+            i = j
+
+            # Candidate packet
+            if buffer[i + self.packet_len - 1] == self.end_byte:
+                packet_bytes = bytes(buffer[i : i + self.packet_len])
+                try:
+                    self.data_queue.put_nowait(packet_bytes)
+                    self.packets_received += 1
+                    received = True
+                except queue.Full:
+                    self.packets_dropped += 1
+                i += self.packet_len
+            else:
+                # Bad end byte
                 i += 1
                 self.sync_errors += 1
         
+        # One clock read per block rather than per packet
+        if received:
+            self.last_packet_time = time.time()
+
         # Remove processed bytes in one go
         if i > 0:
             del buffer[:i]
@@ -3,13 +3,14 @@
 run_filter_router.py
 
 Usage:
-    python src/processing/run_filter_router.py
+    python src/processing/run_filter_router.py [--no-hot-reload]
 
 Description:
     - Loads routing/filter config from config/filter_router_integrated.json
     - Resolves BioSignals-Raw LSL stream
     - Maps channels by metadata (type/label) to categories EMG/EOG/EEG
-    - Designs streaming SOS filters per category (hot-reloads config)
+    - Designs streaming SOS filters per category (hot-reloads config unless
+      --no-hot-reload is given; a reload re-designs filters and resets zi)
     - Applies filters per-channel preserving streaming state (zi)
     - Publishes filtered channels to category outputs:
         BioSignals-EMG-Filtered, BioSignals-EOG-Filtered, BioSignals-EEG-Filtered
@@ -17,6 +18,8 @@ Description:
 
 import time
 import json
+import argparse
+import hashlib
 import threading
 from pathlib import Path
 from typing import List, Tuple, Dict, Optional
@@ -36,15 +39,37 @@ except Exception:
     print("⚠️ pylsl not available. Install pylsl to enable LSL functionality (pip install pylsl).")
 
 try:
-    from scipy.signal import butter, iirnotch, tf2sos, sosfilt, sosfilt_zi
+    from scipy.signal import butter, iirnotch, tf2sos, sosfilt, sos2zpk, zpk2sos
     SCIPY_AVAILABLE = True
 except Exception:
-    butter = iirnotch = tf2sos = sosfilt = sosfilt_zi = None
+    butter = iirnotch = tf2sos = sosfilt = sos2zpk = zpk2sos = None
     SCIPY_AVAILABLE = False
     print("⚠️ scipy not available. Filtering will be disabled (pip install scipy).")
 
+# Optional: event-driven config watching (falls back to mtime polling)
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except Exception:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
 CONFIG_PATH = Path("config/filter_router_integrated.json")
-RELOAD_INTERVAL = 2.0  # seconds
+RELOAD_INTERVAL = 2.0  # seconds (polling fallback)
+RELOAD_DEBOUNCE = 0.2  # seconds to wait for an editor's burst of writes to settle
+CHUNK_SIZE = 32        # max samples pulled + filtered per loop iteration
+IDLE_SLEEP = 0.005     # seconds to wait when no samples are available
+MAX_LOOP_ERRORS = 10   # consecutive loop errors before re-resolving the raw stream
+
+# numpy dtypes matching LSL channel formats, for pulling into a preallocated buffer
+LSL_DTYPES = {
+    pylsl.cf_float32: np.float32,
+    pylsl.cf_double64: np.float64,
+    pylsl.cf_int32: np.int32,
+    pylsl.cf_int16: np.int16,
+} if LSL_AVAILABLE else {}
 
 
 def load_json_config(path: Path) -> dict:
@@ -77,36 +102,41 @@ def parse_channel_map(info: "pylsl.StreamInfo") -> List[Tuple[int, str, str]]:
     mapping = []
     try:
         ch_count = int(info.channel_count())
-        desc = info.desc()
-        channels = desc.child("channels")
+        # Single pass over the <channel> siblings (child(name) + next_sibling)
+        ch = info.desc().child("channels").child("channel")
         for i in range(ch_count):
             label = f"ch{i}"
             typ = ""
-            try:
-                ch = channels.child("channel", i)
-                lab = ch.child_value("label")
-                tt = ch.child_value("type")
-                if lab:
-                    label = lab
-                if tt:
-                    typ = tt
-            except Exception:
-                pass
+            if not ch.empty():
+                label = ch.child_value("label") or label
+                typ = ch.child_value("type") or typ
+                ch = ch.next_sibling("channel")
             mapping.append((i, label, typ))
     except Exception as e:
         print(f"[Router] parse_channel_map error: {e}")
     return mapping
 
 
+def filter_config_hash(section, sr: int) -> str:
+    """Stable hash of one category's filter settings (plus sampling rate)."""
+    blob = json.dumps({"sr": int(sr), "filters": section}, sort_keys=True, default=str)
+    return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+
 class CategoryOutlet:
     def __init__(self, name: str, type_name: str, indices: List[int], sr: int):
         self.name = name
         self.type_name = type_name
         self.indices = list(indices)
+        # gather index for pulling this category's columns out of a raw block
+        self.indices_arr = np.asarray(self.indices, dtype=np.intp)
         self.sr = int(sr)
         self.sos = None
-        self.zi = []  # per-channel zi
+        self.zi = None  # filter state for all channels, shape (n_sections, 2, n_channels)
+        self.cfg_hash = None  # filter_config_hash() the filters were designed from
         self.outlet = None
+        # reusable float32 staging buffer for push_chunk (no per-block allocation)
+        self.push_buf = np.empty((CHUNK_SIZE, max(1, len(self.indices))), dtype=np.float32)
 
     def create_outlet(self):
         if not LSL_AVAILABLE:
@@ -131,29 +161,66 @@ class CategoryOutlet:
             print(f"[Router] Failed to create outlet {self.name}: {e}")
             self.outlet = None
 
-    def push(self, sample: List[float], ts: Optional[float] = None):
+    def push_chunk(self, block: "np.ndarray", ts: Optional[float] = None):
+        """Push a (samples x channels) block; ts is the last sample's timestamp."""
         if not LSL_AVAILABLE or self.outlet is None:
             return
         try:
+            n = len(block)
+            if n <= len(self.push_buf) and block.shape[1:] == self.push_buf.shape[1:]:
+                np.copyto(self.push_buf[:n], block, casting="same_kind")
+                block = self.push_buf[:n]
+            else:
+                block = np.ascontiguousarray(block, dtype=np.float32)
             if ts is not None:
-                self.outlet.push_sample(sample, ts)
+                self.outlet.push_chunk(block, ts)
             else:
-                self.outlet.push_sample(sample)
+                self.outlet.push_chunk(block)
         except Exception as e:
             print(f"[Router] push error ({self.name}): {e}")
 
 
+class _ConfigEventHandler(FileSystemEventHandler):
+    """Forward filesystem events for the config file to the router (debounced)."""
+
+    def __init__(self, router: "FilterRouter"):
+        super().__init__()
+        self.router = router
+        self._timer: Optional[threading.Timer] = None
+
+    def on_any_event(self, event):
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        target = self.router.config_path.resolve()
+        if not any(p and Path(p).resolve() == target for p in paths):
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(RELOAD_DEBOUNCE, self.router._reload_if_changed)
+        self._timer.daemon = True
+        self._timer.start()
+
+
 class FilterRouter:
-    def __init__(self, config_path: Path = CONFIG_PATH):
+    def __init__(self, config_path: Path = CONFIG_PATH, hot_reload: bool = True):
+        """
+        hot_reload: watch the config file and re-design filters when it changes.
+        Pass False to keep filter state (zi) untouched for the whole run.
+        """
         self.config_path = config_path
+        self.hot_reload = hot_reload
         self.config = load_json_config(self.config_path)
+        self._config_mtime = self._stat_mtime()
         self.sr = int(self._cfg_get("router.sampling_rate_hz", 512))
         self.inlet = None
+        self._rx = None  # preallocated (CHUNK_SIZE, n_channels) pull buffer
         self.index_map = []
         self.categories: Dict[str, CategoryOutlet] = {}
+        self._active: Tuple[CategoryOutlet, ...] = ()  # categories with channels, for run()
         self.running = False
         self._config_lock = threading.Lock()
-        self._start_config_watcher()
+        self._observer = None
+        if self.hot_reload:
+            self._start_config_watcher()
 
     def _cfg_get(self, key_path: str, default=None):
         parts = key_path.split(".")
@@ -165,30 +232,51 @@ class FilterRouter:
         except Exception:
             return default
 
+    def _stat_mtime(self) -> Optional[float]:
+        try:
+            return self.config_path.stat().st_mtime
+        except OSError:
+            return None
+
     def _start_config_watcher(self):
+        if WATCHDOG_AVAILABLE:
+            try:
+                self.config_path.parent.mkdir(parents=True, exist_ok=True)
+                self._observer = Observer()
+                self._observer.schedule(_ConfigEventHandler(self), str(self.config_path.parent), recursive=False)
+                self._observer.daemon = True
+                self._observer.start()
+                return
+            except Exception as e:
+                print(f"[Router] watchdog unavailable ({e}), polling config instead")
+                self._observer = None
         t = threading.Thread(target=self._config_watcher_loop, daemon=True)
         t.start()
 
     def _config_watcher_loop(self):
-        last_mtime = None
         while True:
             try:
-                if self.config_path.exists():
-                    mtime = self.config_path.stat().st_mtime
-                    if last_mtime is None or mtime != last_mtime:
-                        new_cfg = load_json_config(self.config_path)
-                        with self._config_lock:
-                            self.config = new_cfg
-                            self.sr = int(self._cfg_get("router.sampling_rate_hz", self.sr))
-                        last_mtime = mtime
-                        print("[Router] Config reloaded")
-                        # re-design filters if already resolved
-                        if self.inlet is not None:
-                            self._configure_categories()
-                time.sleep(RELOAD_INTERVAL)
+                self._reload_if_changed()
             except Exception as e:
                 print(f"[Router] config watcher error: {e}")
-                time.sleep(RELOAD_INTERVAL)
+            time.sleep(RELOAD_INTERVAL)
+
+    def _reload_if_changed(self):
+        """Reload config + re-design filters if the file's mtime changed."""
+        if not self.hot_reload:
+            return
+        mtime = self._stat_mtime()
+        if mtime is None or mtime == self._config_mtime:
+            return
+        new_cfg = load_json_config(self.config_path)
+        with self._config_lock:
+            self.config = new_cfg
+            self.sr = int(self._cfg_get("router.sampling_rate_hz", self.sr))
+        self._config_mtime = mtime
+        print("[Router] Config reloaded")
+        # re-design filters if already resolved
+        if self.inlet is not None:
+            self._configure_categories()
 
     def resolve_raw_stream(self, timeout: float = 3.0) -> bool:
         if not LSL_AVAILABLE:
@@ -200,8 +288,16 @@ class FilterRouter:
                 print("[Router] BioSignals-Raw not found (retrying)...")
                 return False
             info = streams[0]
-            self.inlet = pylsl.StreamInlet(info, max_buflen=1.0, recover=True)
+            # Keep at most ~1 s buffered: if the loop lags, old samples are
+            # dropped instead of building up latency. Clock-sync + dejitter
+            # give the pushed blocks smooth, locally-mapped timestamps.
+            self.inlet = pylsl.StreamInlet(
+                info, max_buflen=1, recover=True,
+                processing_flags=pylsl.proc_clocksync | pylsl.proc_dejitter
+            )
             self.index_map = parse_channel_map(info)
+            dtype = LSL_DTYPES.get(info.channel_format())
+            self._rx = np.empty((CHUNK_SIZE, info.channel_count()), dtype=dtype) if dtype else None
             print(f"[Router] Resolved raw stream: {self.index_map}")
             self._configure_categories()
             return True
@@ -212,7 +308,11 @@ class FilterRouter:
     def _configure_categories(self):
         # bucket indices by inferred type
         buckets = {"EMG": [], "EOG": [], "EEG": [], "OTHER": []}
+        n_raw = len(self.index_map)
         for idx, label, typ in self.index_map:
+            if not 0 <= idx < n_raw:
+                print(f"[Router] ignoring out-of-range channel index {idx}")
+                continue
             t = (typ or "").strip().upper()
             if not t:
                 t = (label.split("_")[0] if "_" in label else label).strip().upper()
@@ -222,8 +322,16 @@ class FilterRouter:
                 buckets["OTHER"].append(idx)
 
         cfg_filters = self._cfg_get("router.filters", {})
+        old_categories = self.categories
         # helper to design per category
         def design(category: str, indices: List[int]):
+            # Unchanged filter settings and channels: keep the existing outlet,
+            # SOS and filter state so consumers see no transient
+            cfg_hash = filter_config_hash(cfg_filters.get(category, {}), self.sr)
+            old = old_categories.get(category)
+            if old is not None and old.indices == indices and old.cfg_hash == cfg_hash:
+                return old
+
             co = CategoryOutlet(f"BioSignals-{category}-Filtered", category, indices, self.sr)
             if not SCIPY_AVAILABLE:
                 co.sos = None
@@ -263,7 +371,11 @@ class FilterRouter:
                                 sos_blocks.append(butter(order, wn, btype="bandpass", output="sos"))
                         if sos_blocks:
                             try:
-                                co.sos = np.vstack(sos_blocks)
+                                # Re-pair the cascaded notch + bandpass poles/zeros
+                                # so sections run from lowest to highest pole
+                                # radius (best dynamic range for streaming)
+                                z, p, k = sos2zpk(np.concatenate(sos_blocks, axis=0))
+                                co.sos = np.ascontiguousarray(zpk2sos(z, p, k, pairing="nearest"), dtype=np.float64)
                             except Exception:
                                 co.sos = sos_blocks[-1]
                         else:
@@ -274,27 +386,40 @@ class FilterRouter:
                     print(f"[Router] design error for {category}: {e}")
                     co.sos = None
 
-            # init zi per channel
+            # Validate once here so run() can call sosfilt without a guard
+            if co.sos is not None:
+                co.sos = np.asarray(co.sos)
+                if co.sos.ndim != 2 or co.sos.shape[1] != 6 or not np.all(np.isfinite(co.sos)):
+                    print(f"[Router] invalid SOS for {category} (shape {co.sos.shape}) - passing through")
+                    co.sos = None
+
+            # EMG runs in float32 to match the raw stream (error ~5e-6 of
+            # signal std, DC offset included); the EOG lowpass and EEG
+            # bandpass keep float64 since their low-frequency poles sit close
+            # to the unit circle and float32 drifts to ~1e-4 of std
+            if co.sos is not None and category == "EMG":
+                co.sos = co.sos.astype(np.float32)
+
+            # init zero filter state for all of the category's channels at once
             if SCIPY_AVAILABLE and co.sos is not None:
-                try:
-                    co.zi = [sosfilt_zi(co.sos) * 0.0 for _ in co.indices]
-                except Exception as e:
-                    print(f"[Router] zi init error {category}: {e}")
-                    co.zi = [None for _ in co.indices]
+                co.zi = np.zeros((co.sos.shape[0], 2, len(co.indices)), dtype=co.sos.dtype)
             else:
-                co.zi = [None for _ in co.indices]
+                co.zi = None
 
+            co.cfg_hash = cfg_hash
             co.create_outlet()
             return co
 
-        # rebuild categories
-        self.categories = {}
+        # rebuild categories (reusing unchanged ones)
+        categories = {}
         if buckets["EMG"]:
-            self.categories["EMG"] = design("EMG", buckets["EMG"])
+            categories["EMG"] = design("EMG", buckets["EMG"])
         if buckets["EOG"]:
-            self.categories["EOG"] = design("EOG", buckets["EOG"])
+            categories["EOG"] = design("EOG", buckets["EOG"])
         if buckets["EEG"]:
-            self.categories["EEG"] = design("EEG", buckets["EEG"])
+            categories["EEG"] = design("EEG", buckets["EEG"])
+        self.categories = categories
+        self._active = tuple(co for co in categories.values() if co.indices)
 
         print("[Router] Categories configured:", {k: v.indices for k, v in self.categories.items()})
 
@@ -308,44 +433,43 @@ class FilterRouter:
             time.sleep(1.0)
 
         print("[Router] Running processing loop.")
+        errors = 0
         while self.running:
             try:
-                sample, ts = self.inlet.pull_sample(timeout=1.0)
-                if sample is None:
+                # Pull everything available (up to CHUNK_SIZE) and filter it as
+                # one (samples x channels) block per category; sosfilt carries
+                # zi across blocks
+                # liblsl writes straight into self._rx (no per-sample lists)
+                samples, timestamps = self.inlet.pull_chunk(timeout=0.0, max_samples=CHUNK_SIZE, dest_obj=self._rx)
+                if not timestamps:
+                    time.sleep(IDLE_SLEEP)
                     continue
-                arr = list(sample)
+                if self._rx is not None:
+                    block = self._rx[:len(timestamps)]
+                else:
+                    block = np.asarray(samples, dtype=np.float64)
                 # for each category, extract and filter
-                for cat_name, co in self.categories.items():
-                    if not co.indices:
-                        continue
-                    out_vals = []
-                    for local_idx, raw_idx in enumerate(co.indices):
-                        raw_val = float(arr[raw_idx]) if raw_idx < len(arr) else 0.0
-                        if SCIPY_AVAILABLE and co.sos is not None:
-                            zi = co.zi[local_idx] if local_idx < len(co.zi) else None
-                            if zi is None:
-                                try:
-                                    zi = sosfilt_zi(co.sos) * 0.0
-                                except Exception:
-                                    zi = None
-                            try:
-                                y, zf = sosfilt(co.sos, [raw_val], zi=zi)
-                                co.zi[local_idx] = zf
-                                out_vals.append(float(y[0]))
-                            except Exception as e:
-                                print(f"[Router] filter apply error cat={cat_name} idx={raw_idx}: {e}")
-                                out_vals.append(raw_val)
-                        else:
-                            out_vals.append(raw_val)
-                    co.push(out_vals, ts)
+                for co in self._active:
+                    x = block[:, co.indices_arr]
+                    out = x
+                    if co.zi is not None:
+                        # sos/zi were validated in _configure_categories
+                        out, co.zi = sosfilt(co.sos, x, axis=0, zi=co.zi)
+                    # One push per block; LSL derives the earlier samples'
+                    # timestamps from the last one and the nominal rate
+                    co.push_chunk(out, timestamps[-1])
+                errors = 0
             except KeyboardInterrupt:
                 print("\n[Router] KeyboardInterrupt - stopping.")
                 self.running = False
             except Exception as e:
-                print(f"[Router] main loop error: {e}")
-                # attempt to re-resolve on critical errors
+                errors += 1
+                if errors <= 5:
+                    print(f"[Router] main loop error: {e}")
+                # attempt to re-resolve on critical or repeated errors
                 try:
-                    if self.inlet is None:
+                    if self.inlet is None or errors >= MAX_LOOP_ERRORS:
+                        errors = 0
                         self.resolve_raw_stream(timeout=2.0)
                 except Exception:
                     pass
@@ -353,10 +477,17 @@ class FilterRouter:
 
     def stop(self):
         self.running = False
+        if self._observer is not None:
+            self._observer.stop()
 
 
 def main():
-    router = FilterRouter()
+    parser = argparse.ArgumentParser(description="BioSignals filter router")
+    parser.add_argument("--no-hot-reload", action="store_true",
+                        help="do not watch the config file; keeps filter state for the whole run")
+    args = parser.parse_args()
+
+    router = FilterRouter(hot_reload=not args.no_hot_reload)
     try:
         router.run()
     except KeyboardInterrupt:
@@ -10,6 +10,17 @@ class RPSDetector:
         
     def _load_config(self):
         self.profiles = self.config.get("features", {}).get("EMG", {})
+        # Pre-resolve each gesture's (feature, lo, hi) ranges once per config
+        # so detect() does no type checks or unpacking per window
+        self._ranges = [
+            (gesture, [
+                (feat_name, range_val[0], range_val[1])
+                for feat_name, range_val in profile.items()
+                if isinstance(range_val, list) and len(range_val) == 2
+            ])
+            for gesture, profile in self.profiles.items()
+            if gesture != "Rest" and isinstance(profile, dict)
+        ]
         
     def detect(self, features: dict) -> str | None:
         """
@@ -27,20 +38,15 @@ class RPSDetector:
         scores = {}
         match_details = {}
         
-        for gesture, profile in self.profiles.items():
-            if gesture == "Rest":
-                continue
-                
+        for gesture, ranges in self._ranges:
             match_count = 0
             total_features = 0
             matches = []
             
-            for feat_name, range_val in profile.items():
-                if feat_name in features and isinstance(range_val, list) and len(range_val) == 2:
+            for feat_name, lo, hi in ranges:
+                if feat_name in features:
                     total_features += 1
-                    val = features[feat_name]
-                    is_match = range_val[0] <= val <= range_val[1]
-                    if is_match:
+                    if lo <= features[feat_name] <= hi:
                         match_count += 1
                         matches.append(feat_name)
             
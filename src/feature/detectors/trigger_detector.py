@@ -9,6 +9,16 @@ class EEGDetector:
         
     def _load_config(self):
         self.profiles = self.config.get("features", {}).get("EEG", {}).get("profiles", {})
+        # Pre-resolve each state's (feature, lo, hi) ranges once per config
+        self._ranges = [
+            (state, [
+                (feat_name, range_val[0], range_val[1])
+                for feat_name, range_val in profile.items()
+                if isinstance(range_val, list) and len(range_val) == 2
+            ])
+            for state, profile in self.profiles.items()
+            if state != "Rest" and isinstance(profile, dict)
+        ]
         
     def detect(self, features: dict) -> str | None:
         """
@@ -20,19 +30,14 @@ class EEGDetector:
         scores = {}
         CONSENSUS_THRESHOLD = 0.6
         
-        for state, profile in self.profiles.items():
-            if state == "Rest":
-                continue
-                
+        for state, ranges in self._ranges:
             match_count = 0
             total_features = 0
             
-            for feat_name, range_val in profile.items():
-                if feat_name in features and isinstance(range_val, list) and len(range_val) == 2:
+            for feat_name, lo, hi in ranges:
+                if feat_name in features:
                     total_features += 1
-                    val = features[feat_name]
-                    is_match = range_val[0] <= val <= range_val[1]
-                    if is_match:
+                    if lo <= features[feat_name] <= hi:
                         match_count += 1
             
             if total_features > 0:
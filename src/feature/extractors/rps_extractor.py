@@ -31,18 +31,23 @@ class RPSExtractor:
         
         # Only extract when buffer is full and at stride matches
         if len(self.buffer) == self.buffer_size and self.sample_count % self.stride == 0:
-            return self._extract_features(list(self.buffer))
+            # Copy the deque straight into a float array (no intermediate list)
+            return self._extract_features(np.fromiter(self.buffer, dtype=float, count=self.buffer_size))
             
         return None
 
     def _extract_features(self, window):
-        data = np.array(window)
+        data = np.asarray(window, dtype=float)
+        # Shared intermediates, computed once for all features below
+        abs_data = np.abs(data)
+        energy = np.sum(data**2)
+        iemg = np.sum(abs_data)
         
         # 1. RMS (Root Mean Square)
-        rms = np.sqrt(np.mean(data**2))
+        rms = np.sqrt(energy / len(data))
         
         # 2. MAV (Mean Absolute Value)
-        mav = np.mean(np.abs(data))
+        mav = iemg / len(data)
         
         # 3. ZCR (Zero Crossing Rate)
         # Count sign changes
@@ -56,13 +61,12 @@ class RPSExtractor:
         wl = np.sum(np.abs(np.diff(data)))
         
         # 6. Peak (Max Absolute Amplitude)
-        peak = np.max(np.abs(data))
+        peak = np.max(abs_data)
         
         # 7. Range (Max - Min)
         rng = np.ptp(data)
         
-        # 8. IEMG (Integrated EMG)
-        iemg = np.sum(np.abs(data))
+        # 8. IEMG (Integrated EMG) - computed above
         
         # 9. Entropy (Approximate entropy via histogram)
         # Using simple histogram entropy as proxy
@@ -71,8 +75,7 @@ class RPSExtractor:
         hist = hist[hist > 0]
         entropy = -np.sum(hist * np.log2(hist))
         
-        # 10. Energy
-        energy = np.sum(data**2)
+        # 10. Energy - computed above
         
         features = {
             "rms": float(rms),
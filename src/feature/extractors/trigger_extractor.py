@@ -40,12 +40,13 @@ class EEGExtractor:
         self.sample_count += 1
         
         if len(self.buffer) == self.buffer_size and self.sample_count % self.stride == 0:
-            return self._extract_features(list(self.buffer))
+            # Copy the deque straight into a float array (no intermediate list)
+            return self._extract_features(np.fromiter(self.buffer, dtype=float, count=self.buffer_size))
             
         return None
 
     def _extract_features(self, window):
-        data = np.array(window)
+        data = np.asarray(window, dtype=float)
         # Simple Periodogram or Welch's method (nperseg=len(data) for 1s window is just fine)
         freqs, psd = signal.welch(data, self.sr, nperseg=len(data))
         
@@ -154,6 +154,7 @@ class FilterRouter:
         self.channel_processors: Dict[int, object] = {}
         self.channel_mapping: Dict[int, Dict] = {}
         self.num_channels = 0
+        self._passthrough_warned = set()  # channels already reported as pass-through
         self.running = False
         self._config_lock = threading.Lock()
         self._start_config_watcher()
@@ -252,6 +253,7 @@ class FilterRouter:
         # Clean up old configuration
         self.channel_processors = {}
         self.channel_mapping = {}
+        self._passthrough_warned = set()
         
         # ========== IMPROVED: Explicitly close old outlet ==========
         if self.outlet is not None:
@@ -396,7 +398,10 @@ class FilterRouter:
                                     filtered_val = processor.process_sample(raw_val)
                                 else:
                                     # ✅ Channel disabled or unmapped - pass through
-                                    print(f"[Router] [WARNING] Channel {ch_idx} disabled or unmapped - passing through")
+                                    # (warn once per channel, not on every sample)
+                                    if ch_idx not in self._passthrough_warned:
+                                        self._passthrough_warned.add(ch_idx)
+                                        print(f"[Router] [WARNING] Channel {ch_idx} disabled or unmapped - passing through")
                                     filtered_val = raw_val
                                 
                                 processed_sample.append(filtered_val)
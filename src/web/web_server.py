@@ -8,9 +8,11 @@ try:
 except Exception:
     pass
 
+import csv
 import json
 import threading
 import time
+from collections import defaultdict
 from pathlib import Path
 from typing import Dict, Optional
 import math
@@ -28,6 +30,14 @@ from flask import Flask, render_template, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit, join_room, leave_room
 
+# Optional fast JSON encoder for Socket.IO packets
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except Exception:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
 # Feature extraction and detection imports
 import numpy as np
 from scipy import stats as scipy_stats
@@ -57,6 +67,24 @@ app = Flask(
 # CORS configuration
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+class OrjsonCodec:
+    """json-module compatible wrapper around orjson for Socket.IO packets.
+
+    Socket.IO calls dumps(data, separators=...) and expects a str back;
+    orjson takes no formatting kwargs and returns bytes. Channel dicts use
+    int keys, so OPT_NON_STR_KEYS keeps the stdlib behaviour of stringifying
+    them.
+    """
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+
 # SocketIO configuration  
 socketio = SocketIO(
     app,
@@ -64,15 +92,18 @@ socketio = SocketIO(
     ping_timeout=10,
     ping_interval=5,
     engineio_logger=False,
-    logger=False
+    logger=False,
+    json=OrjsonCodec if ORJSON_AVAILABLE else json
 )
 
 
 class WebServerState:
     def __init__(self):
         self.inlet = None
+        self.inlet_ready = threading.Event()  # Set once the data inlet is connected
         self.event_inlet = None  # NEW: Event Stream Inlet
         self.channel_mapping = {}
+        self.channel_meta = []  # (index, label, type) per channel, built from channel_mapping
         self.running = False
         self.connected = False
         self.sample_count = 0
@@ -80,6 +111,7 @@ class WebServerState:
         self.sr = DEFAULT_SR
         self.num_channels = 0
         self.config = {}
+        self.config_mtime = None  # mtime of CONFIG_PATH when config was read/written
 
 state = WebServerState()
 
@@ -171,19 +203,51 @@ def save_config(config: dict) -> bool:
         
         print(f"[WebServer] 💾 Config saved to {CONFIG_PATH}")
         state.config = config
+        state.config_mtime = config_mtime()
         return True
     except Exception as e:
         print(f"[WebServer] ❌ Error saving config: {e}")
         return False
 
 
+def config_mtime() -> Optional[int]:
+    """Return the config file's mtime (ns), or None if it does not exist."""
+    try:
+        return CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_config() -> dict:
+    """Return the in-memory config, re-reading it only when the file changed.
+
+    One stat() per call instead of a full JSON parse; edits made by other
+    processes (e.g. the acquisition app) are still picked up.
+    """
+    mtime = config_mtime()
+    if not state.config or mtime != state.config_mtime:
+        state.config = load_config()
+        state.config_mtime = mtime
+    return state.config
+
+
+def write_json(path: Path, obj) -> None:
+    """Write obj to path as indented JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2)
+
+
 # ========== HELPER FUNCTIONS ==========
 
 
 def create_channel_mapping(lsl_info) -> Dict:
     """Create channel mapping from LSL stream info."""
     mapping = {}
-    config = state.config or load_config()
+    config = get_config()
     config_mapping = config.get("channel_mapping", {})
 
     try:
@@ -215,6 +279,15 @@ def create_channel_mapping(lsl_info) -> Dict:
     return mapping
 
 
+def build_channel_meta(mapping: Dict, num_channels: int) -> list:
+    """Precompute the static (index, label, type) of each channel for broadcasting."""
+    meta = []
+    for ch_idx in range(num_channels):
+        ch_mapping = mapping.get(ch_idx, {})
+        meta.append((ch_idx, ch_mapping.get("label", f"ch{ch_idx}"), ch_mapping.get("type", "UNKNOWN")))
+    return meta
+
+
 def resolve_lsl_stream() -> bool:
     """Resolve and connect to LSL stream."""
     if not LSL_AVAILABLE:
@@ -243,7 +316,9 @@ def resolve_lsl_stream() -> bool:
         if target:
             state.inlet = pylsl.StreamInlet(target, max_buflen=1, recover=True)
             state.channel_mapping = create_channel_mapping(state.inlet.info())
+            state.channel_meta = build_channel_meta(state.channel_mapping, state.num_channels)
             state.connected = True
+            state.inlet_ready.set()
             print(f"[WebServer] ✅ Connected to: {target.name()}")
             print(f"[WebServer] Channels: {state.num_channels} @ {state.sr} Hz")
             return True
@@ -318,7 +393,8 @@ def broadcast_data():
 
     while state.running:
         if state.inlet is None:
-            time.sleep(0.1)
+            # Block until resolve_lsl_stream() connects instead of polling
+            state.inlet_ready.wait(timeout=1.0)
             continue
 
         try:
@@ -327,31 +403,37 @@ def broadcast_data():
             if sample is not None and len(sample) == state.num_channels:
                 state.sample_count += 1
 
-                # Format data for broadcasting
-                channels_data = {}
-                for ch_idx in range(state.num_channels):
-                    ch_mapping = state.channel_mapping.get(ch_idx, {})
-                    channels_data[ch_idx] = {
-                        "label": ch_mapping.get("label", f"ch{ch_idx}"),
-                        "type": ch_mapping.get("type", "UNKNOWN"),
-                        "value": float(sample[ch_idx]),
-                        "timestamp": ts
+                # No clients connected: keep draining the inlet but skip
+                # building and emitting a payload nobody receives
+                if state.clients > 0:
+                    # Format data for broadcasting
+                    channels_data = {
+                        ch_idx: {
+                            "label": label,
+                            "type": ch_type,
+                            "value": float(value),
+                            "timestamp": ts
+                        }
+                        for (ch_idx, label, ch_type), value in zip(state.channel_meta, sample)
                     }
 
-                data = {
-                    "stream_name": RAW_STREAM_NAME,
-                    "channels": channels_data,
-                    "channel_count": state.num_channels,
-                    "sample_rate": state.sr,
-                    "sample_count": state.sample_count,
-                    "timestamp": ts
-                }
+                    data = {
+                        "stream_name": RAW_STREAM_NAME,
+                        "channels": channels_data,
+                        "channel_count": state.num_channels,
+                        "sample_rate": state.sr,
+                        "sample_count": state.sample_count,
+                        "timestamp": ts
+                    }
 
-                socketio.emit('bio_data_update', data)
+                    socketio.emit('bio_data_update', data)
 
                 # Log progress every 512 samples
                 if state.sample_count % 512 == 0:
-                    print(f"[WebServer] ✅ {state.sample_count} samples broadcast")
+                    if state.clients > 0:
+                        print(f"[WebServer] ✅ {state.sample_count} samples broadcast")
+                    else:
+                        print(f"[WebServer] {state.sample_count} samples received (no clients connected, not broadcast)")
 
         except Exception as e:
             if "timeout" not in str(e).lower():
@@ -399,7 +481,7 @@ def api_channels():
 @app.route('/api/config', methods=['GET'])
 def api_get_config():
     """Get current configuration."""
-    config = state.config or load_config()
+    config = get_config()
     return jsonify(config)
 
 
@@ -538,22 +620,23 @@ def extract_emg_features(samples: list, sr: int = 512) -> dict:
     
     Features: rms, mav, zcr, var, wl, peak, range, iemg, entropy, energy
     """
-    if not samples or len(samples) < 2:
+    if samples is None or len(samples) < 2:
         return {}
     
-    data = np.array(samples, dtype=float)
+    data = np.asarray(samples, dtype=float)
     n = len(data)
+    abs_data = np.abs(data)
     
     # Core EMG features (matching rps_extractor.py)
-    rms = float(np.sqrt(np.mean(data**2)))
-    mav = float(np.mean(np.abs(data)))
+    energy = float(np.sum(data**2))
+    rms = float(np.sqrt(energy / n))
+    iemg = float(np.sum(abs_data))
+    mav = iemg / n
     zcr = float(((data[:-1] * data[1:]) < 0).sum() / n)
     var = float(np.var(data))
     wl = float(np.sum(np.abs(np.diff(data))))
-    peak = float(np.max(np.abs(data)))
+    peak = float(np.max(abs_data))
     rng = float(np.ptp(data))
-    iemg = float(np.sum(np.abs(data)))
-    energy = float(np.sum(data**2))
     
     # Entropy via histogram
     try:
@@ -582,10 +665,10 @@ def extract_eog_features(samples: list, sr: int = 512) -> dict:
     
     Features: amplitude, duration_ms, rise_time_ms, fall_time_ms, asymmetry, kurtosis, skewness
     """
-    if not samples or len(samples) < 2:
+    if samples is None or len(samples) < 2:
         return {}
     
-    data = np.array(samples, dtype=float)
+    data = np.asarray(samples, dtype=float)
     abs_data = np.abs(data)
     n = len(data)
     
@@ -618,10 +701,10 @@ def extract_eeg_features(samples: list, sr: int = 512) -> dict:
     
     Features: band powers (delta, theta, alpha, beta) and relative powers
     """
-    if not samples or len(samples) < 16:
+    if samples is None or len(samples) < 16:
         return {}
     
-    data = np.array(samples, dtype=float)
+    data = np.asarray(samples, dtype=float)
     
     # Welch's periodogram
     try:
@@ -655,6 +738,18 @@ def extract_eeg_features(samples: list, sr: int = 512) -> dict:
     return features
 
 
+def _sanitize_features(features: dict) -> dict:
+    """Replace NaN/inf feature values with 0.0 so they stay valid JSON.
+
+    e.g. kurtosis/skewness of a flat window come back as NaN. Feature dicts
+    hold a dozen scalars, so math.isfinite beats a NumPy round-trip here.
+    """
+    if all(map(math.isfinite, features.values())):
+        return features
+
+    return {k: (v if math.isfinite(v) else 0.0) for k, v in features.items()}
+
+
 def extract_features_for_sensor(sensor: str, samples: list, sr: int = 512) -> dict:
     """Route to sensor-specific feature extraction."""
     sensor = sensor.upper()
@@ -670,6 +765,10 @@ def extract_features_for_sensor(sensor: str, samples: list, sr: int = 512) -> di
         return extract_emg_features(samples, sr)
 
 
+# Fraction of profile features that must be in range (RPSDetector / EEGDetector)
+CONSENSUS_THRESHOLD = 0.6
+
+
 def detect_for_sensor(sensor: str, action: str, features: dict, config: dict) -> bool:
     """Run sensor-specific detection logic matching the detectors."""
     sensor = sensor.upper()
@@ -714,7 +813,7 @@ def detect_for_sensor(sensor: str, action: str, features: dict, config: dict) ->
         
         if total_features > 0:
             score = match_count / total_features
-            return score >= 0.6  # Consensus threshold
+            return score >= CONSENSUS_THRESHOLD
         return False
     
     elif sensor == "EEG":
@@ -735,7 +834,7 @@ def detect_for_sensor(sensor: str, action: str, features: dict, config: dict) ->
                     match_count += 1
         
         if total_features > 0:
-            return (match_count / total_features) >= 0.6
+            return (match_count / total_features) >= CONSENSUS_THRESHOLD
         return False
     
     return False
@@ -778,27 +877,30 @@ def api_save_window():
         csv_path = windows_dir / safe_name
 
         # Save CSV: timestamp,value
-        with open(csv_path, 'w') as f:
-            f.write('timestamp,value\n')
-            if timestamps and len(timestamps) == len(samples):
-                for t, v in zip(timestamps, samples):
-                    f.write(f"{t},{v}\n")
-            else:
-                # write sample index as time
-                for i, v in enumerate(samples):
-                    f.write(f"{i},{v}\n")
-
-        # Compute features using sensor-specific extraction
-        sr = state.config.get('sampling_rate', 512) if state.config else 512
-        features = extract_features_for_sensor(sensor, samples, sr)
+        if not (timestamps and len(timestamps) == len(samples)):
+            # write sample index as time
+            timestamps = range(len(samples))
+        with open(csv_path, 'w', newline='', buffering=1 << 20) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(('timestamp', 'value'))
+            writer.writerows(zip(timestamps, samples))
 
-        # Save features JSON alongside CSV
-        feat_path = csv_path.with_suffix('.features.json')
-        with open(feat_path, 'w') as f:
-            json.dump({"features": features, "sensor": sensor, "action": action, "channel": channel, "saved_at": ts}, f, indent=2)
+        # Resolve config once for this request (sampling rate + thresholds)
+        cfg = get_config()
 
-        # Load config and update thresholds for sensor/action
-        cfg = state.config or load_config()
+        # Compute features using sensor-specific extraction
+        # (convert once; the extractors reuse the array without copying)
+        sr = cfg.get('sampling_rate', 512)
+        samples_arr = np.asarray(samples, dtype=float)
+        features = _sanitize_features(extract_features_for_sensor(sensor, samples_arr, sr))
+
+        # Save features JSON alongside CSV (nothing to save for windows too
+        # short to extract features from)
+        if features:
+            feat_path = csv_path.with_suffix('.features.json')
+            write_json(feat_path, {"features": features, "sensor": sensor, "action": action, "channel": channel, "saved_at": ts})
+
+        # Update thresholds for sensor/action
         cfg_features = cfg.setdefault('features', {})
         sensor_features = cfg_features.setdefault(sensor, {})
 
@@ -862,6 +964,75 @@ def api_save_window():
 
 # ========== CALIBRATION THRESHOLD OPTIMIZATION ==========
 
+# Recommended calibration windows per action, by sensor type
+RECOMMENDED_SAMPLES = {
+    'EOG': 20,
+    'EMG': 30,
+    'EEG': 25
+}
+
+
+def _percentile_ranks(n: int, lo_q: float, hi_q: float) -> list:
+    """Order-statistic ranks of the (lo, hi) bounds: sorted[int(n*q)], clipped."""
+    return [max(0, int(n * lo_q)), min(n - 1, int(n * hi_q))]
+
+
+def percentile_bounds(values, lo_q: float = 0.05, hi_q: float = 0.95) -> tuple:
+    """Return the (5th, 95th) percentile values of a feature using NumPy.
+
+    Picks the same order statistics as sorted(values)[int(n*q)], but with one
+    np.partition (O(n) selection) instead of a full sort. Not interpolated:
+    with only a few calibration windows the bounds stay on observed values.
+    """
+    arr = np.asarray(values, dtype=float)
+    idx = _percentile_ranks(arr.size, lo_q, hi_q)
+    lo, hi = np.partition(arr, idx)[idx]
+    return float(lo), float(hi)
+
+
+def percentile_bounds_columns(columns: list, lo_q: float = 0.05, hi_q: float = 0.95) -> tuple:
+    """Return (lo, hi) percentile arrays for a list of feature value columns.
+
+    When every window carried every feature (the usual case) the columns
+    are stacked and all bounds come from one np.partition call along axis 1.
+    Ragged columns fall back to percentile_bounds() per column.
+    """
+    if len({len(col) for col in columns}) == 1:
+        stacked = np.array(columns, dtype=float)
+        idx = _percentile_ranks(stacked.shape[1], lo_q, hi_q)
+        picked = np.partition(stacked, idx, axis=1)[:, idx]
+        return picked[:, 0], picked[:, 1]
+
+    bounds = np.array([percentile_bounds(col, lo_q, hi_q) for col in columns]).reshape(-1, 2)
+    return bounds[:, 0], bounds[:, 1]
+
+
+def count_profile_matches(feature_dicts: list, thresholds: dict) -> int:
+    """Count feature dicts that satisfy a {feature: [lo, hi]} profile.
+
+    All windows are checked at once: features become a (windows x features)
+    matrix with NaN for missing values and are compared against the lo/hi
+    vectors. A window matches when at least CONSENSUS_THRESHOLD of the
+    features it has fall in range.
+    """
+    if not feature_dicts or not thresholds:
+        return 0
+
+    names = list(thresholds)
+    bounds = np.array([thresholds[name] for name in names], dtype=float)
+    values = np.array(
+        [[f.get(name, np.nan) for name in names] for f in feature_dicts],
+        dtype=float
+    )
+
+    present = ~np.isnan(values)
+    in_range = (values >= bounds[:, 0]) & (values <= bounds[:, 1])
+    total = present.sum(axis=1)
+    matches = in_range.sum(axis=1)
+
+    score = np.divide(matches, total, out=np.zeros(len(feature_dicts)), where=total > 0)
+    return int(np.count_nonzero((total > 0) & (score >= CONSENSUS_THRESHOLD)))
+
 
 @app.route('/api/calibrate', methods=['POST'])
 def api_calibrate():
@@ -900,20 +1071,15 @@ def api_calibrate():
         if not sensor or not windows:
             return jsonify({"error": "Missing sensor or windows"}), 400
         
-        # Group windows by action
-        windows_by_action = {}
+        # Group feature dicts by action (references into the payload, no copies)
+        features_by_action = defaultdict(list)
         for w in windows:
             action = w.get('action')
             features = w.get('features', {})
             if action and features:
-                if action not in windows_by_action:
-                    windows_by_action[action] = []
-                windows_by_action[action].append({
-                    'features': features,
-                    'status': w.get('status', 'unknown')
-                })
+                features_by_action[action].append(features)
         
-        if not windows_by_action:
+        if not features_by_action:
             return jsonify({"error": "No valid windows with features found"}), 400
         
         # Calculate accuracy before calibration
@@ -925,48 +1091,40 @@ def api_calibrate():
         updated_thresholds = {}
         samples_per_action = {}
         
-        for action, action_windows in windows_by_action.items():
-            samples_per_action[action] = len(action_windows)
+        for action, feature_dicts in features_by_action.items():
+            samples_per_action[action] = len(feature_dicts)
             
-            if len(action_windows) < 3:
+            if len(feature_dicts) < 3:
                 # Not enough samples for reliable thresholds
                 continue
             
-            # Collect all feature values
-            feature_values = {}
-            for w in action_windows:
-                for feat_name, feat_val in w['features'].items():
+            # Collect all feature values, one column (list) per feature
+            feature_values = defaultdict(list)
+            for features in feature_dicts:
+                for feat_name, feat_val in features.items():
                     if isinstance(feat_val, (int, float)):
-                        if feat_name not in feature_values:
-                            feature_values[feat_name] = []
                         feature_values[feat_name].append(feat_val)
             
             # Compute percentile-based ranges (5th-95th to exclude outliers)
             action_thresholds = {}
-            for feat_name, values in feature_values.items():
-                if len(values) >= 3:
-                    sorted_vals = sorted(values)
-                    n = len(sorted_vals)
-                    # 5th percentile
-                    idx_lo = max(0, int(n * 0.05))
-                    # 95th percentile
-                    idx_hi = min(n - 1, int(n * 0.95))
-                    
-                    min_val = sorted_vals[idx_lo]
-                    max_val = sorted_vals[idx_hi]
-                    
-                    # Add small margin (5%)
-                    margin = (max_val - min_val) * 0.05 if max_val != min_val else abs(min_val) * 0.1
-                    action_thresholds[feat_name] = [
-                        round(min_val - margin, 4),
-                        round(max_val + margin, 4)
-                    ]
+            names = [name for name, values in feature_values.items() if len(values) >= 3]
+            if names:
+                min_vals, max_vals = percentile_bounds_columns([feature_values[name] for name in names])
+                
+                # Add small margin (5%), rounding all features in one pass
+                spread = max_vals - min_vals
+                margin = np.where(spread != 0, spread * 0.05, np.abs(min_vals) * 0.1)
+                lo_out = np.round(min_vals - margin, 4).tolist()
+                hi_out = np.round(max_vals + margin, 4).tolist()
+                action_thresholds = {
+                    name: [lo, hi] for name, lo, hi in zip(names, lo_out, hi_out)
+                }
             
             if action_thresholds:
                 updated_thresholds[action] = action_thresholds
         
         # Load current config and update thresholds
-        cfg = state.config or load_config()
+        cfg = get_config()
         cfg_features = cfg.setdefault('features', {})
         sensor_features = cfg_features.setdefault(sensor, {})
         
@@ -993,31 +1151,17 @@ def api_calibrate():
         # Save updated config
         save_success = save_config(cfg)
         
-        # Recalculate accuracy with new thresholds (simulate)
-        correct_after = 0
-        for w in windows:
-            action = w.get('action')
-            features = w.get('features', {})
-            if action in updated_thresholds:
-                # Check if features fall within new thresholds
-                match_count = 0
-                total_feats = 0
-                for feat_name, range_val in updated_thresholds[action].items():
-                    if feat_name in features:
-                        total_feats += 1
-                        if range_val[0] <= features[feat_name] <= range_val[1]:
-                            match_count += 1
-                if total_feats > 0 and (match_count / total_feats) >= 0.6:
-                    correct_after += 1
+        # Recalculate accuracy with new thresholds (simulate). Windows without
+        # features can never match, so the grouping above is reused as is.
+        correct_after = sum(
+            count_profile_matches(features_by_action[action], thresholds)
+            for action, thresholds in updated_thresholds.items()
+        )
         
         accuracy_after = correct_after / total_before if total_before > 0 else 0
         
         # Recommended sample count based on sensor type
-        recommended_samples = {
-            'EOG': 20,
-            'EMG': 30,
-            'EEG': 25
-        }.get(sensor, 20)
+        recommended_samples = RECOMMENDED_SAMPLES.get(sensor, 20)
         
         result = {
             "status": "calibrated",
@@ -1101,7 +1245,7 @@ def handle_message(data):
         
         elif msg_type == 'REQUEST_CONFIG':
             print("[WebServer] 📡 Received REQUEST_CONFIG message")
-            config = state.config or load_config()
+            config = get_config()
             emit('config_response', {"status": "ok", "config": config})
         
         else:
@@ -1124,7 +1268,7 @@ def main():
     print()
 
     # Load config from disk first
-    state.config = load_config()
+    get_config()
 
     # Resolve LSL stream
     if not resolve_lsl_stream():
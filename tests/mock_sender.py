@@ -2,22 +2,38 @@ import time
 import pylsl
 import numpy as np
 
+CHUNK_SIZE = 32  # samples generated and pushed per iteration
+
+
+def generate_chunk(t0, srate, n):
+    """Generate n samples of the 2ch mock signal starting at time t0."""
+    t = t0 + np.arange(n) / srate
+    chunk = np.empty((n, 2), dtype=np.float32)
+    chunk[:, 0] = np.sin(2 * np.pi * 10 * t) + np.random.normal(0, 0.1, n) # 10Hz + noise
+    chunk[:, 1] = np.sin(2 * np.pi * 20 * t) + np.random.normal(0, 0.1, n) # 20Hz + noise
+    return chunk
+
 def main():
     print("[Mock] Creating BioSignals-Raw-uV outlet...")
     info = pylsl.StreamInfo("BioSignals-Raw-uV", "EEG", 2, 512, "float32", "mock_source_id_123")
     outlet = pylsl.StreamOutlet(info)
-    
+
     print("[Mock] Sending data (Sine waves at 10Hz/20Hz)...")
     t = 0
     srate = 512
+    period = CHUNK_SIZE / srate
+    # Schedule against a monotonic clock so time spent generating/pushing
+    # does not accumulate as drift (plain sleep(period) runs slow)
+    next_deadline = time.perf_counter()
     try:
         while True:
-            # Generate 2ch sample
-            val0 = np.sin(2 * np.pi * 10 * t) + np.random.normal(0, 0.1) # 10Hz + noise
-            val1 = np.sin(2 * np.pi * 20 * t) + np.random.normal(0, 0.1) # 20Hz + noise
-            outlet.push_sample([val0, val1])
-            t += 1.0/srate
-            time.sleep(1.0/srate)
+            # Generate a whole chunk of 2ch samples at once
+            outlet.push_chunk(generate_chunk(t, srate, CHUNK_SIZE))
+            t += period
+            next_deadline += period
+            delay = next_deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
     except KeyboardInterrupt:
         print("[Mock] Stopped.")
 
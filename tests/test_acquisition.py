@@ -54,6 +54,33 @@ def test_packet_parser():
         print(f"❌ PacketParser test failed: {e}")
         return False
 
+def test_packet_parser_batch():
+    """Test vectorized batch parsing matches per-packet parsing"""
+    print("\nTesting PacketParser.parse_batch...")
+    
+    try:
+        from src.acquisition import PacketParser
+        
+        parser = PacketParser()
+        packets = [
+            bytes([0xC7, 0x7C, ctr, 0x10, ctr, 0x20, 0xFF - ctr, 0x01])
+            for ctr in range(16)
+        ]
+        
+        counters, ch0, ch1 = parser.parse_batch(packets)
+        
+        for i, pkt in enumerate(packets):
+            single = parser.parse(pkt)
+            assert counters[i] == single.counter, f"Counter mismatch at {i}"
+            assert ch0[i] == single.ch0_raw, f"CH0 mismatch at {i}"
+            assert ch1[i] == single.ch1_raw, f"CH1 mismatch at {i}"
+        
+        print(f"✅ parse_batch matches parse for {len(packets)} packets")
+        return True
+    except Exception as e:
+        print(f"❌ parse_batch test failed: {e}")
+        return False
+
 def test_serial_reader():
     """Test serial reader instantiation"""
     print("\nTesting SerialPacketReader...")
@@ -107,6 +134,7 @@ def main():
     tests = [
         test_imports,
         test_packet_parser,
+        test_packet_parser_batch,
         test_serial_reader,
         test_lsl_streams
     ]
@@ -0,0 +1,79 @@
+import sys
+import os
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from web.web_server import (
+    percentile_bounds, percentile_bounds_columns, count_profile_matches, _sanitize_features
+)
+
+
+def test_percentile_bounds():
+    values = list(range(100, 0, -1))
+    lo, hi = percentile_bounds(values)
+    # Same order statistics as sorted(values)[int(n*0.05)] / [int(n*0.95)]
+    assert lo == 6.0
+    assert hi == 96.0
+
+    lo, hi = percentile_bounds([3.0, 1.0, 2.0])
+    assert (lo, hi) == (1.0, 3.0)
+
+
+
+def test_percentile_bounds_columns():
+    rng = np.random.default_rng(0)
+    columns = [rng.normal(size=20).tolist() for _ in range(4)]
+    lo, hi = percentile_bounds_columns(columns)
+    for col, l, h in zip(columns, lo, hi):
+        assert np.allclose((l, h), percentile_bounds(col))
+
+    # Ragged columns (some windows missing a feature)
+    ragged = [columns[0], columns[1][:7]]
+    lo, hi = percentile_bounds_columns(ragged)
+    for col, l, h in zip(ragged, lo, hi):
+        assert np.allclose((l, h), percentile_bounds(col))
+
+
+def test_count_profile_matches():
+    rng = np.random.default_rng(0)
+    thresholds = {"rms": [0.2, 0.8], "mav": [0.1, 0.5], "zcr": [0.0, 0.3]}
+    windows = []
+    for _ in range(200):
+        feats = {name: float(rng.random()) for name in thresholds if rng.random() > 0.2}
+        windows.append(feats)
+
+    # Reference: the per-window loop the endpoint used before vectorizing
+    expected = 0
+    for features in windows:
+        match_count = 0
+        total_feats = 0
+        for feat_name, range_val in thresholds.items():
+            if feat_name in features:
+                total_feats += 1
+                if range_val[0] <= features[feat_name] <= range_val[1]:
+                    match_count += 1
+        if total_feats > 0 and (match_count / total_feats) >= 0.6:
+            expected += 1
+
+    assert count_profile_matches(windows, thresholds) == expected
+    assert count_profile_matches([], thresholds) == 0
+    assert count_profile_matches([{}], thresholds) == 0
+
+
+def test_sanitize_features():
+    clean = {"rms": 1.0, "zcr": 0.25}
+    assert _sanitize_features(clean) == clean
+    assert _sanitize_features({}) == {}
+
+    dirty = {"amplitude": 2.0, "kurtosis": float("nan"), "skewness": float("inf")}
+    assert _sanitize_features(dirty) == {"amplitude": 2.0, "kurtosis": 0.0, "skewness": 0.0}
+
+
+if __name__ == "__main__":
+    test_percentile_bounds()
+    test_percentile_bounds_columns()
+    test_count_profile_matches()
+    test_sanitize_features()
+    print("[PASS] Calibration helpers")